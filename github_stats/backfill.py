@@ -5,19 +5,109 @@ This tool reads JSON files from the downloaded-events directory and processes th
 through the database service to populate the database with historical data.
 """
 
-import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Iterator, Optional, Tuple
 from loguru import logger
-from dateutil import parser
 from dotenv import load_dotenv
 import asyncio
+import orjson
 
-from github_stats.stores import configure_database_service
-from github_stats.stores.base import EventData, ClickHouseConfig
+from github_stats.stores import configure_database_service, database_backend, clickhouse_config
+from github_stats.stores.base import FILTERED_EVENT_TYPES, EventData, parse_github_timestamp
 from github_stats.stores.clickhouse import ClickHouseDatabaseService
 
+# Number of events accumulated across files before issuing a single INSERT
+DEFAULT_BATCH_SIZE = 100_000
+
+# Quoted type names to look for in the undecoded file. Matching just the value (not `"type":"..."`) keeps
+# the check valid for both compact files and older ones written with `json.dumps` separators.
+_FILTERED_EVENT_TYPE_MARKERS = tuple(f'"{event_type}"'.encode() for event_type in FILTERED_EVENT_TYPES)
+
+# Plain tuple (event_id, event_type, repo_name, repo_id, created_at_ts, action) - cheap to pickle
+# between the parser processes and the inserting process
+EventRow = Tuple[str, str, str, int, datetime, Optional[str]]
+
+
+def _event_row_from_dict(event_dict: Dict[str, Any]) -> EventRow:
+    """Create event row from dictionary - let it crash on missing mandatory fields"""
+    return (
+        str(event_dict["id"]),
+        event_dict["type"],
+        event_dict["repo"]["name"],
+        int(event_dict["repo"]["id"]),
+        parse_github_timestamp(event_dict["created_at"]),
+        # Action is optional, may be None or empty
+        event_dict.get("payload", {}).get("action"),
+    )
+
+
+def _event_data_from_row(row: EventRow, ingested_at: datetime) -> EventData:
+    """Build EventData from a row produced by a parser process (already typed, no validation needed)"""
+    event_id, event_type, repo_name, repo_id, created_at_ts, action = row
+    return EventData.model_construct(
+        event_id=event_id,
+        event_type=event_type,
+        repo_name=repo_name,
+        repo_id=repo_id,
+        created_at_ts=created_at_ts,
+        action=action,
+        ingested_at=ingested_at,
+    )
+
+
+def _process_json_file(file_path: Path) -> List[EventRow]:
+    """
+    Process a single JSON file and return list of relevant event rows.
+
+    Module-level so it can run in a ProcessPoolExecutor worker.
+    """
+    try:
+        raw = file_path.read_bytes()
+
+        # Cheap substring scan first - files without any relevant event are not worth decoding
+        if not any(marker in raw for marker in _FILTERED_EVENT_TYPE_MARKERS):
+            logger.opt(lazy=True).debug("Processed {}: no relevant events", lambda: file_path)
+            return []
+
+        events_data = orjson.loads(raw)
+
+        if not isinstance(events_data, list):
+            logger.warning(f"File {file_path} does not contain a list of events, skipping")
+            return []
+
+        events = []
+        for event_dict in events_data:
+            if not isinstance(event_dict, dict):
+                continue
+
+            event_type = event_dict.get("type", "")
+            if event_type not in FILTERED_EVENT_TYPES:
+                continue
+
+            try:
+                events.append(_event_row_from_dict(event_dict))
+            except Exception as e:
+                logger.warning(f"Failed to create event from data in {file_path}: {e}")
+                continue
+
+        logger.opt(lazy=True).debug(
+            "Processed {}: {} relevant events out of {} total",
+            lambda: file_path,
+            lambda: len(events),
+            lambda: len(events_data),
+        )
+        return events
+
+    except orjson.JSONDecodeError as e:
+        logger.error(f"Failed to parse JSON from {file_path}: {e}")
+        return []
+    except Exception as e:
+        logger.error(f"Error processing file {file_path}: {e}")
+        return []
+
 
 class EventBackfiller:
     """Processes JSON event files and populates database"""
@@ -32,137 +122,133 @@ class EventBackfiller:
             logger.debug(f"Environment file {env_file} not found, using system environment")
 
         self.events_dir = Path(events_dir or os.getenv("EVENTS_DIRECTORY", "downloaded-events"))
-        self.filtered_event_types = {"WatchEvent", "PullRequestEvent", "IssuesEvent"}
 
         # Configure database service based on environment
-        backend = os.getenv("DATABASE_BACKEND", "memory").lower()
+        backend = database_backend()
 
         if backend != "clickhouse":
             logger.error("Backfill tool requires ClickHouse database backend")
             logger.error("Set DATABASE_BACKEND=clickhouse environment variable")
             raise ValueError("Backfill tool only works with ClickHouse database backend")
 
-        # Configure ClickHouse connection
-        clickhouse_config: ClickHouseConfig = {
-            "host": os.getenv("CLICKHOUSE_HOST", "localhost"),
-            "port": int(os.getenv("CLICKHOUSE_PORT", "9000")),
-            "username": os.getenv("CLICKHOUSE_USER", "github_user"),
-            "password": os.getenv("CLICKHOUSE_PASSWORD", "github_pass"),
-            "database": os.getenv("CLICKHOUSE_DATABASE", "github_stats"),
-        }
-
         # Configure the database service - we know it's ClickHouse at this point
-        self.clickhouse_service = configure_database_service(backend, clickhouse_config)
+        self.clickhouse_service = configure_database_service(backend, clickhouse_config())
         assert isinstance(self.clickhouse_service, ClickHouseDatabaseService), "Expected ClickHouse service"
 
         logger.info(f"Backfill tool initialized with ClickHouse backend and events directory: {self.events_dir}")
 
-    def _create_event_data_from_dict(self, event_dict: Dict[str, Any]) -> EventData:
-        """Create EventData object from dictionary - let it crash on missing mandatory fields"""
-        # Parse the created_at timestamp
-        created_at_ts = parser.isoparse(event_dict["created_at"])
-
-        # Extract action (optional, may be None or empty)
-        action = event_dict.get("payload", {}).get("action")
-
-        return EventData(
-            event_id=str(event_dict["id"]),
-            event_type=event_dict["type"],
-            repo_name=event_dict["repo"]["name"],
-            repo_id=int(event_dict["repo"]["id"]),
-            created_at_ts=created_at_ts,
-            action=action,
-        )
+    def iter_json_files(self) -> Iterator[Path]:
+        """Yield all JSON files from the events directory, sorted by filename"""
+        if not self.events_dir.exists():
+            logger.error(f"Events directory {self.events_dir} does not exist")
+            return
 
-    def _process_json_file(self, file_path: Path) -> List[EventData]:
-        """Process a single JSON file and return list of EventData objects"""
+        # scandir gets the file type from the directory entry, so no extra stat() per file as with Path.glob
+        with os.scandir(self.events_dir) as entries:
+            names = [entry.name for entry in entries if entry.name.endswith(".json") and entry.is_file()]
+        names.sort()  # Sort by filename (which includes timestamp)
+
+        logger.info(f"Found {len(names)} JSON files to process")
+        for name in names:
+            yield self.events_dir / name
+
+    async def _insert_batch(self, batch: List[EventData], stats: Dict[str, int]) -> None:
+        """Insert events accumulated from one or more files with a single INSERT"""
         try:
-            with open(file_path, "r") as f:
-                events_data = json.load(f)
-
-            if not isinstance(events_data, list):
-                logger.warning(f"File {file_path} does not contain a list of events, skipping")
-                return []
-
-            events = []
-            for event_dict in events_data:
-                if not isinstance(event_dict, dict):
-                    continue
-
-                event_type = event_dict.get("type", "")
-                if event_type not in self.filtered_event_types:
-                    continue
-
-                try:
-                    event_data = self._create_event_data_from_dict(event_dict)
-                    events.append(event_data)
-                except Exception as e:
-                    logger.warning(f"Failed to create event from data in {file_path}: {e}")
-                    continue
-
-            logger.debug(f"Processed {file_path}: {len(events)} relevant events out of {len(events_data)} total")
-            return events
-
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON from {file_path}: {e}")
-            return []
+            inserted_count = await self.clickhouse_service.insert_event_data(batch)
+            stats["events_inserted"] += inserted_count
+            logger.info(f"Inserted {inserted_count} events from batch of {len(batch)}")
         except Exception as e:
-            logger.error(f"Error processing file {file_path}: {e}")
-            return []
+            logger.error(f"Error inserting batch of {len(batch)} events: {e}")
+            stats["errors"] += 1
+
+    def _collect_parsed_files(
+        self,
+        done: set[asyncio.Future[List[EventRow]]],
+        in_flight: Dict[asyncio.Future[List[EventRow]], Path],
+        pending: List[EventData],
+        stats: Dict[str, int],
+        dry_run: bool,
+    ) -> None:
+        """Move results of finished parser futures into the pending insert buffer"""
+        for future in done:
+            file_path = in_flight.pop(future)
 
-    def get_json_files(self) -> List[Path]:
-        """Get all JSON files from the events directory, sorted by filename"""
-        if not self.events_dir.exists():
-            logger.error(f"Events directory {self.events_dir} does not exist")
-            return []
+            try:
+                rows = future.result()
+            except Exception as e:
+                logger.error(f"Error processing {file_path.name}: {e}")
+                stats["errors"] += 1
+                continue
 
-        json_files = list(self.events_dir.glob("*.json"))
-        json_files.sort()  # Sort by filename (which includes timestamp)
+            stats["files_processed"] += 1
+            stats["events_found"] += len(rows)
 
-        logger.info(f"Found {len(json_files)} JSON files to process")
-        return json_files
+            if rows and not dry_run:
+                # One timestamp per file instead of EventData's per-event default factory
+                ingested_at = datetime.now(timezone.utc)
+                pending.extend(_event_data_from_row(row, ingested_at) for row in rows)
+            elif rows and dry_run:
+                logger.info(f"Would insert {len(rows)} events from {file_path.name} (dry run)")
 
-    async def backfill_from_files(self, dry_run: bool = False) -> Dict[str, int]:
+    async def backfill_from_files(
+        self, dry_run: bool = False, batch_size: int = DEFAULT_BATCH_SIZE, workers: int | None = None
+    ) -> Dict[str, int]:
         """
         Process all JSON files and populate database
 
+        Files are parsed in parallel by a process pool while this coroutine drains the results and
+        inserts them. Events from consecutive files are buffered and inserted in batches of
+        ``batch_size``, so many small files cost one round trip and one new MergeTree part per batch.
+
         Args:
             dry_run: If True, process files but don't insert into database
+            batch_size: Number of events to accumulate before inserting
+            workers: Number of parser processes (default: number of CPUs)
 
         Returns:
             Dictionary with processing statistics
         """
-        json_files = self.get_json_files()
+        stats = {"files_processed": 0, "events_found": 0, "events_inserted": 0, "errors": 0}
 
-        if not json_files:
-            logger.warning("No JSON files found to process")
-            return {"files_processed": 0, "events_inserted": 0, "errors": 0}
+        workers = workers or os.cpu_count() or 1
+        # Bound submitted-but-unconsumed files so parsed rows don't pile up in memory
+        max_in_flight = workers * 2
 
-        stats = {"files_processed": 0, "events_found": 0, "events_inserted": 0, "errors": 0}
+        logger.info(
+            f"Starting backfill of {self.events_dir} (dry_run={dry_run}, batch_size={batch_size}, workers={workers})"
+        )
 
-        logger.info(f"Starting backfill of {len(json_files)} files (dry_run={dry_run})")
+        loop = asyncio.get_running_loop()
+        pending: List[EventData] = []
+        in_flight: Dict[asyncio.Future[List[EventRow]], Path] = {}
 
-        for file_path in json_files:
-            logger.info(f"Processing {file_path.name}...")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for file_path in self.iter_json_files():
+                if len(in_flight) >= max_in_flight:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    self._collect_parsed_files(done, in_flight, pending, stats, dry_run)
 
-            try:
-                event_data_list = self._process_json_file(file_path)
-                stats["events_found"] += len(event_data_list)
+                    if len(pending) >= batch_size:
+                        await self._insert_batch(pending, stats)
+                        pending = []
 
-                if event_data_list and not dry_run:
-                    # Use ClickHouse-specific insert_event_data method (async)
-                    inserted_count = await self.clickhouse_service.insert_event_data(event_data_list)
-                    stats["events_inserted"] += inserted_count
-                    logger.info(f"Inserted {inserted_count} events from {file_path.name}")
+                in_flight[loop.run_in_executor(pool, _process_json_file, file_path)] = file_path
 
-                elif event_data_list and dry_run:
-                    logger.info(f"Would insert {len(event_data_list)} events from {file_path.name} (dry run)")
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                self._collect_parsed_files(done, in_flight, pending, stats, dry_run)
 
-                stats["files_processed"] += 1
+                if len(pending) >= batch_size:
+                    await self._insert_batch(pending, stats)
+                    pending = []
 
-            except Exception as e:
-                logger.error(f"Error processing {file_path.name}: {e}")
-                stats["errors"] += 1
+        if pending:
+            await self._insert_batch(pending, stats)
+
+        if stats["files_processed"] == 0 and stats["errors"] == 0:
+            logger.warning("No JSON files found to process")
+            return {"files_processed": 0, "events_inserted": 0, "errors": 0}
 
         # Log final statistics
         logger.info("Backfill completed!")
@@ -182,11 +268,23 @@ async def async_main():
     parser.add_argument("--events-dir", type=str, help="Directory containing JSON event files (default: downloaded-events)")
     parser.add_argument("--dry-run", action="store_true", help="Process files but don't insert into database")
     parser.add_argument("--dotenv", type=str, default="gh.env", help="Path to .env file (default: gh.env)")
+    parser.add_argument("--workers", type=int, help="Number of parallel file parser processes (default: CPU count)")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Number of events to accumulate across files per INSERT (default: {DEFAULT_BATCH_SIZE})",
+    )
 
     args = parser.parse_args()
 
     backfiller = EventBackfiller(events_dir=args.events_dir, dotenv_path=args.dotenv)
-    stats = await backfiller.backfill_from_files(dry_run=args.dry_run)
+    try:
+        stats = await backfiller.backfill_from_files(
+            dry_run=args.dry_run, batch_size=args.batch_size, workers=args.workers
+        )
+    finally:
+        await backfiller.clickhouse_service.close()
 
     if stats["errors"] > 0:
         exit(1)
@@ -0,0 +1,66 @@
+"""
+Small async result cache for API handlers - TTL memoization with single-flight computation.
+"""
+
+from time import monotonic
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+from loguru import logger
+import asyncio
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class AsyncTTLCache(Generic[K, V]):
+    """
+    Caches results of an async computation per key for ``ttl_sec`` seconds.
+
+    Concurrent misses for the same key share one computation (single-flight): the first caller
+    starts it as a task and the others await the same task. Everything runs on the event loop
+    thread, so no lock is needed - there is no await between checking and registering a key.
+    """
+
+    def __init__(self, name: str, ttl_sec: float, maxsize: int = 64):
+        self.name = name
+        self.ttl_sec = ttl_sec
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[K, tuple[float, V]] = {}
+        self._inflight: dict[K, asyncio.Task[V]] = {}
+
+    async def get_or_compute(self, key: K, compute: Callable[[], Awaitable[V]]) -> V:
+        """Get cached value for key, or compute it (once across concurrent callers) and cache it"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > monotonic():
+            self.hits += 1
+            logger.opt(lazy=True).debug("{} cache hit for {}", lambda: self.name, lambda: key)
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            logger.opt(lazy=True).debug("{} cache miss for {}", lambda: self.name, lambda: key)
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._on_computed(key, done))
+
+        # Shielded, so a cancelled caller (e.g. disconnected client) doesn't cancel the shared computation
+        return await asyncio.shield(task)
+
+    def _on_computed(self, key: K, task: asyncio.Task[V]):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        # Re-inserted at the end, so dict order stays expiry order (re-assigning a key keeps its old position)
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.maxsize:
+            now = monotonic()
+            for stale_key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                del self._entries[stale_key]
+            if len(self._entries) >= self.maxsize:
+                # Still full - drop the entry closest to expiry
+                del self._entries[next(iter(self._entries))]
+
+        self._entries[key] = (monotonic() + self.ttl_sec, task.result())
@@ -1,17 +1,20 @@
-import json
 import os
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
-from typing import Any, List
+from typing import List
 from loguru import logger
-from github import Github
-from github.Event import Event
-import time
 import asyncio
 import httpx
+import orjson
 
 from github_stats.models import ClientState
-from github_stats.stores import get_database_service
+from github_stats.stores import get_database_service, database_backend, BatchingInserter, RawEvent
+
+# Max event files being written in the background at once
+MAX_PENDING_WRITES = 4
+
+# Delay of the next poll after a failed one, unless GitHub asks for a longer one (Retry-After, rate limit reset)
+POLL_RETRY_DELAY_SEC = 60
 
 
 class GitHubEventsClient:
@@ -19,8 +22,13 @@ class GitHubEventsClient:
         self.state_file = Path(state_file or os.getenv("CLIENT_STATE_FILE", "state/client-state.json"))
         self.events_dir = Path(events_dir or os.getenv("EVENTS_DIRECTORY", "downloaded-events"))
 
-        # Check if file saving is enabled
-        self.save_to_files = os.getenv("SAVE_EVENTS_TO_FILES", "true").lower() == "true"
+        # Check if file saving is enabled - with ClickHouse the raw files are redundant, so it's opt-in there
+        default_save = "false" if database_backend() == "clickhouse" else "true"
+        self.save_to_files = os.getenv("SAVE_EVENTS_TO_FILES", default_save).lower() == "true"
+        # References to in-flight file writes, so they are not garbage collected before finishing
+        self._pending_writes: set[asyncio.Task[None]] = set()
+        # Soft cap on in-flight file writes - each one holds a whole poll's raw bytes in memory
+        self._write_slots = asyncio.Semaphore(MAX_PENDING_WRITES)
 
         # Only create events directory if saving is enabled
         if self.save_to_files:
@@ -31,20 +39,54 @@ class GitHubEventsClient:
 
         self.state_file.parent.mkdir(exist_ok=True)
 
-        token = os.getenv("GITHUB_TOKEN")
-        if not token:
-            logger.warning("GITHUB_TOKEN not found, using unauthenticated requests (rate limited)")
-            self.github = Github()
-        else:
-            self.github = Github(token)
+        # Single keep-alive HTTP client reused across polls, so consecutive requests
+        # share one TCP connection and TLS session instead of a handshake per poll
+        self._http = httpx.AsyncClient(
+            base_url="https://api.github.com",
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=300),
+            headers=self._auth_headers(),
+        )
+
+        # Polls are inserted in batches spanning several polls - fewer round trips and MergeTree parts
+        self.inserter = BatchingInserter(
+            get_database_service(),
+            max_batch_size=int(os.getenv("INSERT_MAX_BATCH_SIZE", "1000")),
+            flush_interval_sec=int(os.getenv("INSERT_FLUSH_INTERVAL_MS", "30000")) / 1000,
+            max_queue_size=int(os.getenv("INSERT_MAX_QUEUE_SIZE", "100000")),
+        )
 
+        # Serialized state as last written to (or read from) disk, to skip rewriting unchanged state
+        self._last_saved_state = b""
         self.state = self._load_state()
 
         logger.debug(
-            f"Initialized PyGitHub client with state file: {self.state_file}, time of next poll: {self.state.next_poll_time_ts}"
+            f"Initialized GitHub events client with state file: {self.state_file}, time of next poll: {self.state.next_poll_time_ts}"
         )
 
-    def sleep_till_poll_time(self):
+    @staticmethod
+    def _auth_headers() -> dict[str, str]:
+        """Build GitHub API request headers, authenticated when GITHUB_TOKEN is set"""
+        headers = {"Accept": "application/vnd.github+json"}
+        token = os.getenv("GITHUB_TOKEN")
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        else:
+            logger.warning("GITHUB_TOKEN not found, using unauthenticated requests (rate limited)")
+        return headers
+
+    async def aclose(self):
+        """Flush buffered events, wait for pending event file writes and close the underlying HTTP client"""
+        try:
+            inserted_count = await self.inserter.aclose()
+            logger.info(f"Inserted {inserted_count} buffered events into database on shutdown")
+        except Exception as e:
+            logger.error(f"Failed to flush buffered events on shutdown: {e}")
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+        await self._http.aclose()
+
+    async def sleep_till_poll_time(self):
         """Sleeps till next poll_time based on next_poll_ime_ts"""
         now = datetime.now(timezone.utc)
 
@@ -53,110 +95,163 @@ class GitHubEventsClient:
         if self.state.next_poll_time_ts > now:
             wait_time_sec: float = (self.state.next_poll_time_ts - now).total_seconds()
             logger.info(f"Waiting {wait_time_sec:.1f} seconds until next poll time")
-            time.sleep(wait_time_sec)
+            await asyncio.sleep(wait_time_sec)
         else:
             logger.info("next poll time is in history, no sleeping now")
 
     def _load_state(self) -> ClientState:
         if self.state_file.exists():
             logger.debug(f"Loading state from {self.state_file}")
-            return ClientState.model_validate_json(self.state_file.read_text())
+            data = self.state_file.read_bytes()
+            self._last_saved_state = data
+            return ClientState.from_dict(orjson.loads(data))
         logger.debug("No existing state file found, creating new state")
         return ClientState()
 
     def _save_state(self):
-        self.state_file.write_text(self.state.model_dump_json())
-        logger.debug(f"State saved to {self.state_file}")
-
-    def _save_events_to_file(self, events: List[Event], poll_ts: datetime):
-        """Save events to JSON file (only if file saving is enabled)"""
+        """Persist state if it changed since the last save, replacing the file atomically"""
+        # orjson serializes the dataclass and its datetimes (ISO 8601) natively
+        data = orjson.dumps(self.state)
+        if data == self._last_saved_state:
+            return
+
+        # Write aside and rename, so a crash mid-write never leaves a truncated state file behind
+        tmp_file = self.state_file.with_suffix(".tmp")
+        tmp_file.write_bytes(data)
+        os.replace(tmp_file, self.state_file)
+        self._last_saved_state = data
+
+    def _save_events_to_file(self, raw_events: bytes, events_count: int, poll_ts: datetime):
+        """Save raw events JSON, as received from GitHub, to file (only if file saving is enabled)"""
         timestamp = poll_ts.strftime("%Y-%m-%dT%H-%M-%S")
         filename = self.events_dir.joinpath(f"{timestamp}.json")
 
-        raw_events = [event.raw_data for event in events]
-        filename.write_text(json.dumps(raw_events))
-        logger.info(f"Saved {len(events)} events to {filename}")
-
-    def _check_rate_limit(self):
-        """Check and respect GitHub API rate limits"""
-        try:
-            rate_limit = self.github.get_rate_limit()
-            logger.info(rate_limit)
-
-            if rate_limit.rate.remaining < 10:  # Conservative threshold
-                sleep_time = (rate_limit.rate.reset - datetime.now(timezone.utc)).total_seconds()
-                if sleep_time > 0:
-                    logger.warning(f"Rate limit low, sleeping for {sleep_time} seconds")
-                    time.sleep(sleep_time)
+        filename.write_bytes(raw_events)
+        logger.info(f"Saved {events_count} events to {filename}")
 
-        except Exception as e:
-            logger.warning(f"Could not check rate limit: {e}")
+    def _on_write_done(self, task: asyncio.Task[None]):
+        self._pending_writes.discard(task)
+        self._write_slots.release()
+        if not task.cancelled() and task.exception():
+            logger.error(f"Failed to save events to file: {task.exception()}")
 
-    def get_poll_interval(self) -> int:
-        """Get poll interval from GitHub's X-Poll-Interval header via HEAD request"""
+    def _rate_limit_reset_time(self, headers: httpx.Headers) -> datetime | None:
+        """Return rate limit reset time if the X-RateLimit-* response headers say we're nearly out of requests"""
         try:
-            token = os.getenv("GITHUB_TOKEN")
-            headers = {"Accept": "application/vnd.github+json"}
-            if token:
-                headers["Authorization"] = f"Bearer {token}"
-
-            response = httpx.head("https://api.github.com/events", headers=headers)
-
-            # Check for X-Poll-Interval header
-            poll_interval = response.headers.get("X-Poll-Interval")
-            if not poll_interval:
-                logger.debug("No X-Poll-Interval header found, using default")
-                return 60  # Default fallback
+            remaining = int(headers.get("X-RateLimit-Remaining", "1000"))
+            reset_ts = int(headers.get("X-RateLimit-Reset", "0"))
+        except ValueError as e:
+            logger.warning(f"Could not parse rate limit headers: {e}")
+            return None
+
+        logger.info(f"GitHub rate limit remaining: {remaining}")
+        if remaining < 10:  # Conservative threshold
+            return datetime.fromtimestamp(reset_ts, tz=timezone.utc)
+        return None
+
+    def _postpone_after_failure(self, error: Exception):
+        """Move the next poll time forward after a failed poll, honoring GitHub's back-off headers if it sent any"""
+        retry_time = datetime.now(timezone.utc) + timedelta(seconds=POLL_RETRY_DELAY_SEC)
+
+        # Rate limited requests fail with 403/429 - the back-off headers then come only with the error response
+        if isinstance(error, httpx.HTTPStatusError):
+            headers = error.response.headers
+            retry_after = headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                retry_time = max(retry_time, datetime.now(timezone.utc) + timedelta(seconds=int(retry_after)))
+            reset_time = self._rate_limit_reset_time(headers)
+            if reset_time:
+                retry_time = max(retry_time, reset_time)
+
+        if self.state.next_poll_time_ts is None or retry_time > self.state.next_poll_time_ts:
+            self.state.next_poll_time_ts = retry_time
+        logger.warning(f"Poll failed, next poll at {self.state.next_poll_time_ts}")
+        self._save_state()
+
+    def get_poll_interval(self, headers: httpx.Headers) -> int:
+        """Get poll interval from GitHub's X-Poll-Interval response header"""
+        poll_interval = headers.get("X-Poll-Interval")
+        if not poll_interval:
+            logger.debug("No X-Poll-Interval header found, using default")
+            return 60  # Default fallback
 
+        try:
             interval_sec = int(poll_interval)
-            logger.debug(f"Got poll interval from GitHub headers: {interval_sec}s")
-            return interval_sec
-
-        except Exception as e:
-            logger.warning(f"Could not get poll interval from headers: {e}")
+        except ValueError as e:
+            logger.warning(f"Could not parse poll interval from headers: {e}")
             return 60  # Default fallback
 
-    def _get_public_events(self) -> tuple[List[Event], int]:
-        """Get public events using PyGitHub and returns time in seconds till next poll interval"""
+        logger.debug(f"Got poll interval from GitHub headers: {interval_sec}s")
+        return interval_sec
+
+    async def _get_public_events(self) -> tuple[List[RawEvent], bytes, httpx.Headers]:
+        """
+        Get public events as raw JSON dicts, together with the raw response body and the first page's headers.
+
+        GitHub caps /events at 300 events, so with per_page=100 this is at most three requests
+        over the shared keep-alive connection. Each page is decoded once; the raw bytes are kept so
+        the on-disk copy doesn't need re-serializing.
+        """
         try:
-            # PyGitHub doesn't support conditional requests directly,
-            # but we can still fetch events and compare timestamps
-            events = list(self.github.get_events())
+            response = await self._http.get("/events", params={"per_page": 100})
+            response.raise_for_status()
+            headers = response.headers
+            bodies = [response.content]
+            events: List[RawEvent] = orjson.loads(response.content)
 
-            # Get poll interval from GitHub's headers after fetching events
-            github_poll_interval = self.get_poll_interval()
+            while "next" in response.links:
+                response = await self._http.get(response.links["next"]["url"])
+                response.raise_for_status()
+                bodies.append(response.content)
+                events.extend(orjson.loads(response.content))
 
-            return (events, github_poll_interval)
+            return (events, self._join_json_arrays(bodies), headers)
 
         except Exception as e:
             logger.error(f"Error getting public events: {e}")
             raise
 
-    def poll_events(self) -> List[Any]:
-        """Poll GitHub events using PyGitHub"""
-        logger.debug("Polling GitHub events using PyGitHub")
+    @staticmethod
+    def _join_json_arrays(bodies: List[bytes]) -> bytes:
+        """Concatenate JSON array documents into a single array without decoding them"""
+        if len(bodies) == 1:
+            return bodies[0]
+        items = [inner for inner in (body.strip()[1:-1].strip() for body in bodies) if inner]
+        return b"[" + b",".join(items) + b"]"
 
-        self._check_rate_limit()
+    async def poll_events(self) -> List[RawEvent]:
+        """Poll GitHub public events"""
+        logger.debug("Polling GitHub events")
 
         try:
-            events, poll_after_sec = self._get_public_events()
+            events, raw_events, headers = await self._get_public_events()
+            poll_after_sec = self.get_poll_interval(headers)
             poll_ts = datetime.now(timezone.utc)
             self.state.next_poll_time_ts = poll_ts + timedelta(seconds=poll_after_sec)
 
+            # Nearly out of requests - postpone next poll till the limit resets instead of sleeping here
+            reset_time = self._rate_limit_reset_time(headers)
+            if reset_time and reset_time > self.state.next_poll_time_ts:
+                logger.warning(f"Rate limit low, postponing next poll till {reset_time}")
+                self.state.next_poll_time_ts = reset_time
+
             if not events:
                 logger.debug("No events available")
                 self._save_state()
                 return []
 
-            # Save events to files only if enabled
+            # Save events to files only if enabled, in the background so the database insert doesn't wait on disk
             if self.save_to_files:
-                self._save_events_to_file(events, poll_ts)
+                # Waits only when disk falls behind by MAX_PENDING_WRITES polls
+                await self._write_slots.acquire()
+                write = asyncio.create_task(asyncio.to_thread(self._save_events_to_file, raw_events, len(events), poll_ts))
+                self._pending_writes.add(write)
+                write.add_done_callback(self._on_write_done)
             else:
                 logger.debug(f"Downloaded {len(events)} events (file saving disabled)")
 
-            # Store events in database for server access (deduplication handled by database service)
-            inserted_count = asyncio.run(get_database_service().insert_events(events))
-            logger.info(f"Inserted {inserted_count} events into database")
+            # Queue events for the database, inserted by the batching drain task (deduplication handled by database service)
+            self.inserter.add_events(events)
 
             self._save_state()
 
@@ -164,4 +259,24 @@ class GitHubEventsClient:
 
         except Exception as e:
             logger.error(f"Error polling events: {e}")
+            self._postpone_after_failure(e)
             return []
+
+    async def poll_forever(self):
+        """Poll GitHub events until cancelled, sleeping on the event loop between polls"""
+        logger.info("Starting GitHub events polling")
+        self.inserter.start()
+
+        # Check if we need to wait before first poll
+        if self.state.next_poll_time_ts:
+            await self.sleep_till_poll_time()
+
+        while True:
+            try:
+                events = await self.poll_events()
+                if events:
+                    logger.info(f"Client downloaded {len(events)} events")
+                await self.sleep_till_poll_time()
+            except Exception as e:
+                logger.error(f"Error in client polling: {e}")
+                await asyncio.sleep(60)  # Wait 1 minute before retrying
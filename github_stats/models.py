@@ -1,11 +1,18 @@
-from pydantic import BaseModel
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
 
-class ClientState(BaseModel):
+@dataclass(slots=True)
+class ClientState:
     # etag: Optional[str] = None
     # last_modified: Optional[str] = None
     # last_poll: Optional[datetime] = None
     # poll_interval_sec: int = 60
     next_poll_time_ts: Optional[datetime] = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ClientState":
+        """Build state from the decoded state file, parsing ISO 8601 timestamps"""
+        next_poll_time_ts = data.get("next_poll_time_ts")
+        return cls(next_poll_time_ts=datetime.fromisoformat(next_poll_time_ts) if next_poll_time_ts else None)
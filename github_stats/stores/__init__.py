@@ -4,6 +4,9 @@ Database stores package - clean re-exports and global instance management.
 
 # Re-export all base classes and models
 from .base import (
+    RawEvent,
+    FILTERED_EVENT_TYPES,
+    parse_github_timestamp,
     EventData,
     EventCountsByType,
     EventInfo,
@@ -16,6 +19,9 @@ from .base import (
 
 # Re-export configuration functions
 from .setup import create_database_service, configure_database_service
+from .config import database_backend, clickhouse_config, memory_max_events
+
+from .batching import BatchingInserter
 
 # Re-export implementations for convenience
 from .memory import InMemoryDatabaseService
@@ -49,6 +55,9 @@ def set_database_service(service: DatabaseService) -> None:
 # Export all public classes and functions
 __all__ = [
     # Base classes and models
+    "RawEvent",
+    "FILTERED_EVENT_TYPES",
+    "parse_github_timestamp",
     "EventData",
     "EventCountsByType",
     "EventInfo",
@@ -60,8 +69,12 @@ __all__ = [
     # Implementations
     "InMemoryDatabaseService",
     "ClickHouseDatabaseService",
+    "BatchingInserter",
     # Configuration
     "create_database_service",
     "configure_database_service",
     "get_database_service",
+    "database_backend",
+    "clickhouse_config",
+    "memory_max_events",
 ]
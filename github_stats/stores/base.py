@@ -5,10 +5,35 @@ This file has zero codebase dependencies to maintain clean architecture.
 
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, TypedDict
-from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional, TypedDict
+from pydantic import BaseModel, ConfigDict, Field
 
-from github.Event import Event
+
+# Raw GitHub event as returned by the REST API (decoded JSON object)
+RawEvent = Dict[str, Any]
+
+# Event types that are stored, everything else is dropped on insert
+FILTERED_EVENT_TYPES = frozenset({"WatchEvent", "PullRequestEvent", "IssuesEvent"})
+
+
+def parse_github_timestamp(value: str) -> datetime:
+    """
+    Parse a GitHub API timestamp into an aware UTC datetime.
+
+    GitHub always emits the fixed-shape ``YYYY-MM-DDTHH:MM:SSZ`` form, which is sliced directly;
+    anything else falls back to ``datetime.fromisoformat``.
+    """
+    if len(value) == 20 and value[19] == "Z":
+        return datetime(
+            int(value[0:4]),
+            int(value[5:7]),
+            int(value[8:10]),
+            int(value[11:13]),
+            int(value[14:16]),
+            int(value[17:19]),
+            tzinfo=timezone.utc,
+        )
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
 
 
 # Pydantic models for structured data
@@ -17,6 +42,9 @@ from github.Event import Event
 class EventData(BaseModel):
     """Structured representation of a GitHub event for database storage"""
 
+    # Immutable once built - no validate-on-assignment machinery, safe to share between threads
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     event_id: str
     event_type: str
     repo_name: str
@@ -86,8 +114,8 @@ class DatabaseService(ABC):
     """Abstract base class for database operations"""
 
     @abstractmethod
-    async def insert_events(self, events: list[Event]) -> int:
-        """Insert GitHub events and return count of inserted records"""
+    async def insert_events(self, events: List[RawEvent]) -> int:
+        """Insert raw GitHub events and return count of inserted records"""
         pass
 
     @abstractmethod
@@ -105,6 +133,15 @@ class DatabaseService(ABC):
         """Calculate average time between pull requests for a repository in seconds"""
         pass
 
+    @abstractmethod
+    async def get_pr_metrics(self, repo_name: str) -> PullRequestMetrics:
+        """
+        Get average time between pull requests and their count for a repository in one pass.
+
+        Prefer this over calling calculate_avg_pr_time and get_pull_request_events_for_repo separately.
+        """
+        pass
+
     @abstractmethod
     async def get_health_status(self) -> DatabaseHealth:
         """Get database connection and health information"""
@@ -124,3 +161,7 @@ class DatabaseService(ABC):
     async def get_repos_by_event_count(self, limit: int = 10) -> List[RepoEventCount]:
         """Get repositories sorted by event count (descending) with optional limit"""
         pass
+
+    async def close(self) -> None:
+        """Release backend resources (connections) - no-op unless the backend holds any"""
+        pass
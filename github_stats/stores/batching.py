@@ -0,0 +1,101 @@
+"""
+Buffered inserts - accumulate raw events from several polls and insert them with a single call.
+"""
+
+from collections import deque
+from typing import Deque, List
+from loguru import logger
+import asyncio
+
+from .base import DatabaseService, RawEvent
+
+
+class BatchingInserter:
+    """
+    Queues raw events and inserts them into the database service in batches.
+
+    Producers only append to the queue; a single drain task inserts up to ``max_batch_size`` events
+    per call, woken up once a full batch is queued or every ``flush_interval_sec`` at the latest.
+    At most ``max_queue_size`` events are kept queued (e.g. while the database is down), the oldest
+    are dropped first.
+    """
+
+    def __init__(
+        self,
+        service: DatabaseService,
+        max_batch_size: int = 1000,
+        flush_interval_sec: float = 30.0,
+        max_queue_size: int = 100_000,
+    ):
+        self.service = service
+        self.max_batch_size = max_batch_size
+        self.flush_interval_sec = flush_interval_sec
+        self.max_queue_size = max(max_queue_size, max_batch_size)
+        self._queue: Deque[RawEvent] = deque()
+        self._batch_ready = asyncio.Event()
+        self._drain_task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def add_events(self, events: List[RawEvent]):
+        """Queue events for insertion, waking the drain task once a full batch is available"""
+        self._queue.extend(events)
+        self._drop_overflow()
+        if len(self._queue) >= self.max_batch_size:
+            self._batch_ready.set()
+
+    def _drop_overflow(self):
+        """Drop the oldest queued events beyond max_queue_size"""
+        overflow = len(self._queue) - self.max_queue_size
+        if overflow > 0:
+            for _ in range(overflow):
+                self._queue.popleft()
+            logger.warning(f"Insert queue full, dropped {overflow} oldest events")
+
+    def start(self):
+        """Start the background drain task on the running event loop"""
+        if self._drain_task is None:
+            self._drain_task = asyncio.create_task(self._drain_forever())
+
+    async def aclose(self) -> int:
+        """Stop the drain task and insert everything still queued. Returns count of inserted records"""
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+            try:
+                await self._drain_task
+            except asyncio.CancelledError:
+                pass
+            self._drain_task = None
+        return await self.flush()
+
+    async def flush(self) -> int:
+        """Insert all queued events, at most max_batch_size per call. Returns count of inserted records"""
+        inserted_count = 0
+        while self._queue:
+            batch_size = min(self.max_batch_size, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(batch_size)]
+            try:
+                inserted_count += await self.service.insert_events(batch)
+            except BaseException:
+                # Put the events back in front for the next flush (including on cancellation). Not exactly-once:
+                # a batch the database partly applied before failing may be counted again on retry
+                self._queue.extendleft(reversed(batch))
+                self._drop_overflow()
+                raise
+        return inserted_count
+
+    async def _drain_forever(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval_sec)
+            except TimeoutError:
+                pass
+            self._batch_ready.clear()
+
+            try:
+                inserted_count = await self.flush()
+                if inserted_count:
+                    logger.info(f"Inserted {inserted_count} events into database")
+            except Exception as e:
+                logger.error(f"Failed to insert queued events, {len(self._queue)} kept for retry: {e}")
@@ -2,17 +2,62 @@
 ClickHouse implementation of DatabaseService
 """
 
-# from datetime import datetime, timezone, timedelta
-from typing import List, Any
-from github.Event import Event
+from collections import OrderedDict
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Any, AsyncIterator, Iterable, List, Sequence, Tuple
 from loguru import logger
 
-from .base import DatabaseService, EventData, EventCountsByType, DatabaseHealth, EventInfo, RepoEventCount
+from .base import FILTERED_EVENT_TYPES, DatabaseService, RawEvent, parse_github_timestamp, EventData, EventCountsByType, PullRequestMetrics, DatabaseHealth, EventInfo, RepoEventCount
 
 from asynch import Pool
 from contextlib import asynccontextmanager
 import asyncio
-import threading
+
+# Positional rows are packed straight into native-protocol column blocks, without a per-row dict lookup per column
+INSERT_EVENTS_QUERY = (
+    "INSERT INTO events (event_id, event_type, repo_name, repo_id, created_at_ts, action, ingested_at) VALUES"
+)
+
+# Server-side buffering of inserts: ClickHouse coalesces concurrent small inserts into one part per flush
+# instead of creating a part per INSERT. Waiting for the flush keeps insert errors visible to the caller.
+ASYNC_INSERT_SETTINGS = {
+    "async_insert": 1,
+    "wait_for_async_insert": 1,
+    "async_insert_busy_timeout_ms": 1000,
+    "async_insert_max_data_size": 10_000_000,
+}
+
+# Number of inserted event ids remembered to skip re-inserting events returned again by the next polls.
+# The events API serves at most a few hundred latest events, so this covers many polls of overlap.
+RECENT_EVENT_IDS_SIZE = 100_000
+
+# Batches larger than this are split into concurrent INSERTs over separate pooled connections (backfill sizes;
+# poller batches stay far below it and go out as a single INSERT)
+PARALLEL_INSERT_THRESHOLD = 10_000
+
+# Max ids in one `event_id IN (...)` existence probe - keeps query text small and each probe a few primary
+# index ranges (event_id leads the sorting key) instead of one huge literal list the server has to parse
+EXISTING_IDS_CHUNK_SIZE = 1000
+
+# Health probes are frequent, their count/max scan is served from cache for this long (dropped on insert)
+HEALTH_CACHE_TTL_SEC = 5.0
+
+# Per-repository event counts are served from cache for this long (dropped on insert), at most this many repos
+REPO_COUNT_CACHE_TTL_SEC = 10.0
+REPO_COUNT_CACHE_MAXSIZE = 1024
+
+# After a pre-aggregated table query fails, the raw events table is queried instead for this long
+AGG_RETRY_SEC = 300.0
+
+# Rows per block when streaming large results - the driver holds one block at a time instead of the whole result
+STREAM_BLOCK_ROWS = 10_000
+
+# Plain WHERE so the optimizer can answer it from the p_repo_count projection
+COUNT_BY_REPO_QUERY = "SELECT count(*) FROM events WHERE repo_name = %(repo_name)s"
+
+# (event_id, event_type, repo_name, repo_id, created_at_ts, action, ingested_at)
+EventRow = Tuple[str, str, str, int, datetime, str, datetime]
 
 
 class ClickHouseDatabaseService(DatabaseService):
@@ -25,36 +70,50 @@ class ClickHouseDatabaseService(DatabaseService):
         username: str = "github_app_user",
         password: str = "github_app_pass",
         database: str = "github_stats",
+        insert_concurrency: int = 4,
     ):
-        self.filtered_event_types = {"WatchEvent", "PullRequestEvent", "IssuesEvent"}
         self.host = host
         self.port = port
         self.username = username
         self.password = password
         self.database = database
-        # Store pools per thread/event loop to avoid cross-loop issues
-        self._pools = {}
-        self._lock = threading.Lock()
-
-    async def _ensure_pool(self):
-        """Create connection pool per event loop to avoid cross-loop issues"""
-        loop = asyncio.get_event_loop()
-        loop_id = id(loop)
-
-        # Check if we already have a pool for this event loop
-        with self._lock:
-            if loop_id not in self._pools:
-                self._pools[loop_id] = Pool(
-                    host=self.host,
-                    port=self.port,
-                    user=self.username,
-                    password=self.password,
-                    database=self.database,
-                    minsize=2,  # Minimum connections in pool
-                    maxsize=10,  # Maximum connections in pool
-                )
-                logger.info(f"Created connection pool for event loop {loop_id} to ClickHouse at {self.host}:{self.port}")
-            return self._pools[loop_id]
+        # Concurrent INSERTs per large batch, returns diminish quickly past a few per server
+        self.insert_concurrency = insert_concurrency
+        # Single pool, created lazily on first use - poller and API share one event loop
+        self._pool: Pool | None = None
+        # Ids of recently inserted events in insertion order (dict used as an ordered set)
+        self._recent_event_ids: OrderedDict[str, None] = OrderedDict()
+        # (expires_at monotonic time, health), only successful checks are cached
+        self._health_cache: Tuple[float, DatabaseHealth] | None = None
+        # repo_name -> (expires_at monotonic time, event count)
+        self._repo_count_cache: dict[str, Tuple[float, int]] = {}
+        # monotonic times until which the event counts / PR metrics aggregates are skipped after a failure
+        self._event_counts_agg_retry_at = 0.0
+        self._pr_metrics_agg_retry_at = 0.0
+
+    async def _ensure_pool(self) -> Pool:
+        """Create the connection pool on first use"""
+        if self._pool is None:
+            self._pool = Pool(
+                host=self.host,
+                port=self.port,
+                user=self.username,
+                password=self.password,
+                database=self.database,
+                minsize=2,  # Minimum connections in pool
+                maxsize=max(10, self.insert_concurrency),  # Maximum connections in pool
+                # Compress data blocks on the wire - LZ4 runs at GB/s and repetitive event rows shrink severalfold
+                compression="lz4",
+            )
+            logger.info(f"Created connection pool to ClickHouse at {self.host}:{self.port}")
+        return self._pool
+
+    async def close(self) -> None:
+        """Close all pooled connections"""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await pool.shutdown()
+            logger.info("Closed ClickHouse connection pool")
 
     @asynccontextmanager
     async def _get_connection(self):
@@ -65,211 +124,249 @@ class ClickHouseDatabaseService(DatabaseService):
             yield conn
         # Connection automatically returned to pool when context exits
 
-    def _event_to_data(self, event: Event) -> EventData:
-        """Convert GitHub Event to EventData"""
-        return EventData(
-            event_id=event.id,
-            event_type=event.type,
-            repo_name=event.repo.name if event.repo.name else "unknown",
-            repo_id=event.repo.id if event.repo.id else 0,
-            created_at_ts=event.created_at,
-            action=getattr(event.payload, "action", None),
-        )
-
-    async def _filter_duplicate_events(self, events: List[Event]) -> List[Event]:
-        """Filter out events that already exist in database (keep oldest)"""
-        if not events:
-            return []
-
-        event_ids = [event.id for event in events]
-        existing_query = """
-        SELECT DISTINCT event_id 
-        FROM events 
-        WHERE event_id IN %(event_ids)s
+    async def _stream_rows(self, query: str, params: dict[str, Any]) -> AsyncIterator[List[tuple]]:
         """
+        Execute a query and yield its result rows in blocks of up to STREAM_BLOCK_ROWS.
 
-        try:
-            async with self._get_connection() as connection:
-                async with connection.cursor() as cursor:
-                    await cursor.execute(existing_query, {"event_ids": event_ids})
-                    existing_result = await cursor.fetchall()
-
-            existing_event_ids = {row[0] for row in existing_result}
-
-            logger.debug(f"Found {len(existing_result)} existing events in database")
-
-            # Filter out events that already exist (keep oldest = skip duplicates)
-            new_events = [event for event in events if event.id not in existing_event_ids]
+        The driver reads the result block by block from the socket, so building Python objects from one block
+        overlaps with receiving the next and the full raw result is never buffered. Consume it to the end.
+        """
+        async with self._get_connection() as connection:
+            async with connection.cursor() as cursor:
+                cursor.set_stream_results(True, STREAM_BLOCK_ROWS)
+                await cursor.execute(query, params)
+                while rows := await cursor.fetchmany(STREAM_BLOCK_ROWS):
+                    yield rows
+
+    @staticmethod
+    def _event_to_row(event: RawEvent, ingested_at: datetime) -> EventRow:
+        """Convert raw GitHub event straight to an insert row, without an intermediate EventData"""
+        repo = event.get("repo") or {}
+        return (
+            str(event["id"]),
+            event["type"],
+            repo.get("name") or "unknown",
+            repo.get("id") or 0,
+            parse_github_timestamp(event["created_at"]),
+            (event.get("payload") or {}).get("action") or "",
+            ingested_at,
+        )
 
-            if len(new_events) < len(events):
-                logger.debug(f"Filtered out {len(events) - len(new_events)} duplicate events")
+    @staticmethod
+    def _event_data_to_row(event_data: EventData) -> EventRow:
+        return (
+            event_data.event_id,
+            event_data.event_type,
+            event_data.repo_name,
+            event_data.repo_id,
+            event_data.created_at_ts,
+            event_data.action or "",
+            event_data.ingested_at,
+        )
 
-            return new_events
+    async def _insert_rows(self, rows: Sequence[EventRow]) -> int:
+        """Insert positional rows in INSERT_EVENTS_QUERY column order and return the inserted row count"""
+        async with self._get_connection() as connection:
+            async with connection.cursor() as cursor:
+                # Only the insert cursor gets these - reads and health checks keep default settings
+                cursor.set_settings(dict(ASYNC_INSERT_SETTINGS))
+                inserted_count = await cursor.execute(INSERT_EVENTS_QUERY, rows)
+
+        # Cached health totals and counts are stale now
+        self._health_cache = None
+        self._repo_count_cache.clear()
+        return inserted_count
+
+    async def _insert(self, rows: List[EventRow]) -> int:
+        """Insert rows, large batches as concurrent chunks, and return the inserted row count"""
+        if len(rows) <= PARALLEL_INSERT_THRESHOLD or self.insert_concurrency < 2:
+            return await self._insert_rows(rows)
+
+        # Each chunk is its own INSERT on its own connection, so client-side row serialization of one chunk
+        # overlaps with network transfer and server-side parsing of the others
+        chunk_size = -(-len(rows) // self.insert_concurrency)
+        inserted_counts = await asyncio.gather(
+            *(self._insert_rows(rows[start : start + chunk_size]) for start in range(0, len(rows), chunk_size))
+        )
+        return sum(inserted_counts)
 
-        except Exception as e:
-            logger.warning(f"Failed to check for duplicate events: {e}")
-            # Fallback to returning all events if deduplication check fails
-            return events
+    def _remember_inserted(self, event_ids: Iterable[str]) -> None:
+        """Record ids of inserted events, forgetting the oldest once RECENT_EVENT_IDS_SIZE is exceeded"""
+        recent_event_ids = self._recent_event_ids
+        for event_id in event_ids:
+            recent_event_ids[event_id] = None
+        while len(recent_event_ids) > RECENT_EVENT_IDS_SIZE:
+            recent_event_ids.popitem(last=False)
 
-    async def insert_events(self, events: List[Event]) -> int:
-        """Insert GitHub events and return count of inserted records (deduplicates to keep oldest)"""
-        if not events:
-            return 0
+    async def _existing_event_ids(self, event_ids: List[str], first_ts: datetime, last_ts: datetime) -> set[str]:
+        """
+        Get which of the given event ids, created between first_ts and last_ts (inclusive), are already stored.
 
-        filtered_events = [event for event in events if event.type in self.filtered_event_types]
+        Probes at most EXISTING_IDS_CHUNK_SIZE ids per query.
+        """
+        # Nothing to probe - don't even check out a connection (an empty IN list is also invalid SQL)
+        if not event_ids:
+            return set()
+
+        # event_id leads the sorting key, so the IN probe reads only the matching index ranges. A stored duplicate
+        # has the very same created_at_ts, so bounding it by the batch span is exact and skips every monthly
+        # partition outside the span (and granules via idx_event_time_type). Bounds are whole epoch seconds -
+        # the driver would format datetimes without their timezone. No DISTINCT - rare not-yet-merged duplicates
+        # collapse in the Python set for free, a server-side hash aggregation doesn't
+        existing_query = """
+        SELECT event_id 
+        FROM events 
+        WHERE created_at_ts >= toDateTime(%(first_ts)s)
+          AND created_at_ts < toDateTime(%(after_last_ts)s)
+          AND event_id IN %(event_ids)s
+        """
+        params: dict[str, Any] = {
+            "first_ts": int(first_ts.timestamp()),
+            "after_last_ts": int(last_ts.timestamp()) + 1,
+        }
+
+        existing_event_ids: set[str] = set()
+        async with self._get_connection() as connection:
+            for start in range(0, len(event_ids), EXISTING_IDS_CHUNK_SIZE):
+                params["event_ids"] = event_ids[start : start + EXISTING_IDS_CHUNK_SIZE]
+                async with connection.cursor() as cursor:
+                    await cursor.execute(existing_query, params)
+                    existing_event_ids.update(row[0] for row in await cursor.fetchall())
+        return existing_event_ids
 
-        if not filtered_events:
-            return 0
+    async def _insert_deduplicated(self, rows: List[EventRow]) -> int:
+        """
+        Deduplicate rows (keeping the oldest), insert the new ones and return count of inserted records.
 
+        Shared by insert_events and insert_event_data. Events already stored are skipped - not only in the raw
+        events table (a ReplacingMergeTree would collapse them on merge) but because every inserted row also
+        feeds the materialized views, whose aggregates must not count an event twice.
+        """
         # First, deduplicate within the current batch (keep oldest by ID)
-        logger.debug(f"Event count before batch deduplication: {len(filtered_events)}")
-        event_id_map: dict[str, Event] = {event.id: event for event in filtered_events}
-        logger.debug(f"Unique event IDs in batch: {len(event_id_map)}")
+        logger.debug(f"Event count before batch deduplication: {len(rows)}")
+        # Single pass over the batch, only the id strings are kept aside
+        seen: set[str] = set()
+        new_rows = [row for row in rows if not (row[0] in seen or seen.add(row[0]))]
+        logger.debug(f"Unique event IDs in batch: {len(new_rows)}")
+
+        # Then drop events already inserted by this process (overlap between consecutive polls) without asking
+        # the database about them
+        recent_event_ids = self._recent_event_ids
+        unique_count = len(new_rows)
+        new_rows = [row for row in new_rows if row[0] not in recent_event_ids]
+        if len(new_rows) < unique_count:
+            logger.debug(f"Filtered out {unique_count - len(new_rows)} recently inserted events")
+
+        # Then the database - catches overlap across restarts, other instances and retried batches
+        if new_rows:
+            try:
+                created_ats = [row[4] for row in new_rows]
+                existing_event_ids = await self._existing_event_ids(
+                    [row[0] for row in new_rows], min(created_ats), max(created_ats)
+                )
+
+                logger.debug(f"Found {len(existing_event_ids)} existing events in database")
 
-        batch_deduplicated_events = list(event_id_map.values())
+                # Filter out events that already exist (keep oldest = skip duplicates)
+                if existing_event_ids:
+                    new_rows = [row for row in new_rows if row[0] not in existing_event_ids]
 
-        # Then, remove duplicates against database (keep oldest)
-        new_events = await self._filter_duplicate_events(batch_deduplicated_events)
+            except Exception as e:
+                logger.warning(f"Failed to check for duplicate events: {e}")
+                # Fallback to using all events if deduplication check fails
 
-        if not new_events:
+        if not new_rows:
             logger.debug("All events already exist, skipping duplicates")
             return 0
 
-        event_data_list = [self._event_to_data(event) for event in new_events]
-
-        # Prepare data for ClickHouse insertion using parameter substitution
-        rows: list[dict[str, Any]] = []
-        for event_data in event_data_list:
-            rows.append(
-                {
-                    "event_id": event_data.event_id,
-                    "event_type": event_data.event_type,
-                    "repo_name": event_data.repo_name,
-                    "repo_id": event_data.repo_id,
-                    "created_at_ts": event_data.created_at_ts,
-                    "action": event_data.action or "",
-                    "ingested_at": event_data.ingested_at,
-                }
-            )
-
         try:
-            async with self._get_connection() as connection:
-                async with connection.cursor() as cursor:
-                    await cursor.execute(
-                        "INSERT INTO events (event_id, event_type, repo_name, repo_id, created_at_ts, action, ingested_at) VALUES",
-                        rows,
-                    )
+            inserted_count = await self._insert(new_rows)
+            # Only after a successful insert, a failed batch is retried and must not be filtered out then
+            self._remember_inserted(row[0] for row in new_rows)
 
-            logger.debug(f"Inserted {len(event_data_list)} events into ClickHouse")
-            return len(event_data_list)
+            logger.debug(f"Inserted {inserted_count} events into ClickHouse")
+            return inserted_count
 
         except Exception as e:
             logger.error(f"Failed to insert events into ClickHouse: {e}")
             raise
 
-    async def insert_event_data(self, event_data_list: List[EventData]) -> int:
-        """Insert EventData objects directly and return count of inserted records"""
-        if not event_data_list:
-            return 0
+    async def insert_events(self, events: List[RawEvent]) -> int:
+        """Insert raw GitHub events and return count of inserted records (deduplicates to keep oldest)"""
+        ingested_at = datetime.now(timezone.utc)
+        event_to_row = self._event_to_row
+        rows = [event_to_row(event, ingested_at) for event in events if event.get("type") in FILTERED_EVENT_TYPES]
 
-        # First, deduplicate within the current batch (keep oldest by ID)
-        logger.debug(f"Event data count before batch deduplication: {len(event_data_list)}")
-        event_id_map: dict[str, EventData] = {event_data.event_id: event_data for event_data in event_data_list}
-        logger.debug(f"Unique event data IDs in batch: {len(event_id_map)}")
+        if not rows:
+            return 0
 
-        batch_deduplicated_events = list(event_id_map.values())
+        return await self._insert_deduplicated(rows)
 
-        # Then filter for duplicate EventData based on event_id against database
-        event_ids = [event_data.event_id for event_data in batch_deduplicated_events]
-        existing_query = """
-        SELECT DISTINCT event_id 
-        FROM events 
-        WHERE event_id IN %(event_ids)s
+    async def insert_event_data(self, event_data_list: List[EventData]) -> int:
         """
+        Insert EventData objects directly and return count of inserted records
 
-        try:
-            async with self._get_connection() as connection:
-                async with connection.cursor() as cursor:
-                    await cursor.execute(existing_query, {"event_ids": event_ids})
-                    existing_result = await cursor.fetchall()
-            existing_event_ids = {row[0] for row in existing_result}
-
-            logger.debug(f"Found {len(existing_result)} existing events in database")
-
-            # Filter out events that already exist (keep oldest = skip duplicates)
-            new_event_data = [
-                event_data for event_data in batch_deduplicated_events if event_data.event_id not in existing_event_ids
-            ]
-
-            if len(new_event_data) < len(batch_deduplicated_events):
-                logger.debug(
-                    f"Filtered out {len(batch_deduplicated_events) - len(new_event_data)} duplicate events from database"
-                )
-
-        except Exception as e:
-            logger.warning(f"Failed to check for duplicate events: {e}")
-            # Fallback to using all events if deduplication check fails
-            new_event_data = batch_deduplicated_events
-
-        if not new_event_data:
-            logger.debug("All events already exist, skipping duplicates")
+        Used by the backfill tool, which re-reads files that may be loaded already - the existing id lookup
+        keeps re-runs from double counting in the materialized views.
+        """
+        if not event_data_list:
             return 0
 
-        # Prepare data for ClickHouse insertion
-        rows: list[dict[str, Any]] = []
-        for event_data in new_event_data:
-            rows.append(
-                {
-                    "event_id": event_data.event_id,
-                    "event_type": event_data.event_type,
-                    "repo_name": event_data.repo_name,
-                    "repo_id": event_data.repo_id,
-                    "created_at_ts": event_data.created_at_ts,
-                    "action": event_data.action or "",
-                    "ingested_at": event_data.ingested_at,
-                }
-            )
+        event_data_to_row = self._event_data_to_row
+        return await self._insert_deduplicated([event_data_to_row(event_data) for event_data in event_data_list])
 
-        try:
-            async with self._get_connection() as connection:
-                async with connection.cursor() as cursor:
-                    await cursor.execute(
-                        "INSERT INTO events (event_id, event_type, repo_name, repo_id, created_at_ts, action, ingested_at) VALUES",
-                        rows,
-                    )
-
-            logger.debug(f"Inserted {len(new_event_data)} events into ClickHouse")
-            return len(new_event_data)
-
-        except Exception as e:
-            logger.error(f"Failed to insert events into ClickHouse: {e}")
-            raise
+    async def _query_event_counts(self, query: str, offset_minutes: int) -> Tuple[dict[str, int], int]:
+        """Run a `GROUP BY event_type WITH ROLLUP` count query and return (counts by type, total)"""
+        async with self._get_connection() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, {"offset_minutes": offset_minutes})
+                result = await cursor.fetchall()
+        event_counts = dict(result)
+        # The rollup row carries the grand total under the default (empty) key - the key is grouped as a String,
+        # an Enum8 key would default to its first member and collide with a real type
+        return event_counts, event_counts.pop("", 0)
 
     async def get_events_by_type_and_offset(self, offset_minutes: int) -> EventCountsByType:
-        """Get event counts by type within the specified time offset"""
-        query = """
+        """Get event counts by type within the specified time offset using pre-aggregated minute buckets"""
+        # Sums whole minute buckets starting at or after the cutoff (minute granularity) - reads at most
+        # offset_minutes * event types rows instead of every event in the window. WITH ROLLUP adds the total
+        # as one more row computed from the same aggregation state
+        agg_query = """
+        SELECT 
+            toString(event_type) as event_type,
+            sum(event_count) as count
+        FROM event_counts_per_min 
+        WHERE bucket >= now() - INTERVAL %(offset_minutes)s MINUTE
+        GROUP BY event_type WITH ROLLUP
+        """
+
+        raw_query = """
         SELECT 
-            event_type,
+            toString(event_type) as event_type,
             count(*) as count
         FROM events 
         WHERE created_at_ts >= now() - INTERVAL %(offset_minutes)s MINUTE
-        GROUP BY event_type
+        GROUP BY event_type WITH ROLLUP
         """
 
         try:
-            async with self._get_connection() as connection:
-                async with connection.cursor() as cursor:
-                    await cursor.execute(query, {"offset_minutes": offset_minutes})
-                    result = await cursor.fetchall()
-
-            event_counts = {}
-            for row in result:
-                event_type, count = row
-                event_counts[event_type] = count
+            if self._event_counts_agg_retry_at <= monotonic():
+                try:
+                    event_counts, total_events = await self._query_event_counts(agg_query, offset_minutes)
+                    return EventCountsByType.model_construct(
+                        offset_minutes=offset_minutes, event_counts=event_counts, total_events=total_events
+                    )
+                except Exception as e:
+                    # E.g. a database created before the aggregate existed - don't retry (and log) on every request
+                    self._event_counts_agg_retry_at = monotonic() + AGG_RETRY_SEC
+                    logger.warning(f"Event counts aggregate unavailable, using raw events for {AGG_RETRY_SEC:.0f}s: {e}")
 
-            total_events = sum(event_counts.values())
+            # Fallback to raw events table if aggregated data fails
+            event_counts, total_events = await self._query_event_counts(raw_query, offset_minutes)
 
-            return EventCountsByType(offset_minutes=offset_minutes, event_counts=event_counts, total_events=total_events)
+            return EventCountsByType.model_construct(
+                offset_minutes=offset_minutes, event_counts=event_counts, total_events=total_events
+            )
 
         except Exception as e:
             logger.error(f"Failed to get event counts from ClickHouse: {e}")
@@ -277,44 +374,36 @@ class ClickHouseDatabaseService(DatabaseService):
 
     async def get_pull_request_events_for_repo(self, repo_name: str) -> List[EventData]:
         """Get minimal PR event data - only timestamps needed for calculations"""
-        # First try to get from aggregated table for count
-        count_query = """
-        SELECT sum(pr_count) 
-        FROM pr_metrics_agg 
-        WHERE repo_name = %(repo_name)s
-        """
-
-        # Get only timestamps from events table (minimal data)
+        # Get only timestamps from events table (minimal data).
+        # Plain WHERE so the optimizer can answer it from the p_pr projection - sorted by (repo_name, event_type,
+        # action, created_at_ts), it reads only the matching granules and streams them already in order
         events_query = """
         SELECT created_at_ts
         FROM events 
-        WHERE event_type = 'PullRequestEvent' 
-          AND repo_name = %(repo_name)s
+        WHERE repo_name = %(repo_name)s
+          AND event_type = 'PullRequestEvent' 
           AND action = 'opened'
         ORDER BY created_at_ts
         """
 
         try:
-            async with self._get_connection() as connection:
-                async with connection.cursor() as cursor:
-                    await cursor.execute(events_query, {"repo_name": repo_name})
-                    result = await cursor.fetchall()
-            logger.debug(f"received {len(result)} PR timestamps")
-
             # Return minimal EventData - only timestamps are actually used
-            events = []
-            for row in result:
-                events.append(
-                    EventData(
+            construct = EventData.model_construct
+            events: List[EventData] = []
+            async for rows in self._stream_rows(events_query, {"repo_name": repo_name}):
+                events.extend(
+                    construct(
                         event_id="",
                         event_type="PullRequestEvent",
                         repo_name=repo_name,
                         repo_id=0,
-                        created_at_ts=row[0],
+                        created_at_ts=created_at_ts,
                         action="opened",
-                        ingested_at=row[0],
+                        ingested_at=created_at_ts,
                     )
+                    for (created_at_ts,) in rows
                 )
+            logger.debug(f"received {len(events)} PR timestamps")
 
             return events
 
@@ -322,9 +411,39 @@ class ClickHouseDatabaseService(DatabaseService):
             logger.error(f"Failed to get PR events from ClickHouse: {e}")
             raise
 
+    async def _raw_pr_span(self, repo_name: str) -> Tuple[int, datetime | None, datetime | None]:
+        """
+        Get count, first and last timestamp of opened PRs from the raw events table in one aggregate row.
+
+        Gaps between time-sorted PRs sum to last - first, so these three values are all the average needs -
+        no per-PR rows are sent to the client. Plain WHERE so the optimizer can answer it from the p_pr projection.
+        """
+        query = """
+        SELECT 
+            count() as total_prs,
+            min(created_at_ts) as earliest_pr,
+            max(created_at_ts) as latest_pr
+        FROM events 
+        WHERE repo_name = %(repo_name)s
+          AND event_type = 'PullRequestEvent' 
+          AND action = 'opened'
+        """
+
+        async with self._get_connection() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, {"repo_name": repo_name})
+                result = await cursor.fetchall()
+
+        if not result or not result[0][0]:
+            return 0, None, None
+        return result[0][0], result[0][1], result[0][2]
+
     async def calculate_avg_pr_time(self, repo_name: str) -> float:
         """Calculate average time between pull requests using pre-aggregated data"""
-        # Use the pre-aggregated pr_metrics_agg table for faster calculation
+        return (await self.get_pr_metrics(repo_name)).average_time_seconds
+
+    async def get_pr_metrics(self, repo_name: str) -> PullRequestMetrics:
+        """Get average time between pull requests and their count with a single pre-aggregated query"""
         query = """
         SELECT 
             sum(pr_count) as total_prs,
@@ -334,77 +453,82 @@ class ClickHouseDatabaseService(DatabaseService):
         WHERE repo_name = %(repo_name)s
         """
 
-        try:
-            async with self._get_connection() as connection:
-                async with connection.cursor() as cursor:
-                    await cursor.execute(query, {"repo_name": repo_name})
-                    result = await cursor.fetchall()
-
-            if result and result[0][0] and result[0][0] > 1:
-                total_prs = result[0][0]
-                earliest_pr = result[0][1]
-                latest_pr = result[0][2]
+        if self._pr_metrics_agg_retry_at <= monotonic():
+            try:
+                async with self._get_connection() as connection:
+                    async with connection.cursor() as cursor:
+                        await cursor.execute(query, {"repo_name": repo_name})
+                        result = await cursor.fetchall()
 
-                # Calculate average seconds between PRs
-                total_duration_sec = (latest_pr - earliest_pr).total_seconds()
-                avg_seconds = total_duration_sec / (total_prs - 1)
-                return avg_seconds
+                total_prs = result[0][0] if result and result[0][0] else 0
+                avg_seconds = 0.0
+                if total_prs > 1:
+                    avg_seconds = (result[0][2] - result[0][1]).total_seconds() / (total_prs - 1)
 
-            return 0.0
+                return PullRequestMetrics.model_construct(
+                    repository=repo_name, average_time_seconds=avg_seconds, total_pull_requests=total_prs
+                )
 
-        except Exception as e:
-            logger.error(f"Failed to calculate avg PR time from aggregated data: {e}")
-            # Fallback to raw events table if aggregated data fails
-            pr_events = await self.get_pull_request_events_for_repo(repo_name)
+            except Exception as e:
+                # E.g. a database created before the aggregate existed - don't retry (and log) on every request
+                self._pr_metrics_agg_retry_at = monotonic() + AGG_RETRY_SEC
+                logger.warning(f"PR metrics aggregate unavailable, using raw events for {AGG_RETRY_SEC:.0f}s: {e}")
 
-            if len(pr_events) < 2:
-                return 0.0
+        # Fallback to raw events table if aggregated data fails
+        total_prs, earliest_pr, latest_pr = await self._raw_pr_span(repo_name)
 
-            time_diffs: list[float] = []
-            for i in range(1, len(pr_events)):
-                diff = (pr_events[i].created_at_ts - pr_events[i - 1].created_at_ts).total_seconds()
-                time_diffs.append(diff)
+        avg_seconds = 0.0
+        if total_prs > 1:
+            avg_seconds = (latest_pr - earliest_pr).total_seconds() / (total_prs - 1)
 
-            return sum(time_diffs) / len(time_diffs) if time_diffs else 0.0
+        return PullRequestMetrics.model_construct(
+            repository=repo_name, average_time_seconds=avg_seconds, total_pull_requests=total_prs
+        )
 
     async def get_health_status(self) -> DatabaseHealth:
-        """Get database connection and health information"""
+        """Get database connection and health information (cached for HEALTH_CACHE_TTL_SEC)"""
+        cached = self._health_cache
+        if cached is not None and cached[0] > monotonic():
+            return cached[1]
+
         try:
-            # Test connection and get metrics
+            # One round trip - a successful query also proves connectivity, no separate SELECT 1 needed
+            # count() and max() of the partition key column are answered from part metadata, not a scan
             async with self._get_connection() as connection:
                 async with connection.cursor() as cursor:
-                    await cursor.execute("SELECT 1")
-
-                # Get total events
-                async with connection.cursor() as cursor:
-                    await cursor.execute("SELECT count(*) FROM events")
-                    total_result = await cursor.fetchall()
-                total_events = total_result[0][0] if total_result else 0
-
-                # Get latest event timestamp
-                async with connection.cursor() as cursor:
-                    await cursor.execute("SELECT max(created_at_ts) FROM events")
-                    latest_result = await cursor.fetchall()
-                last_event_ts = latest_result[0][0] if latest_result else None
+                    await cursor.execute("SELECT count(), max(created_at_ts) FROM events")
+                    result = await cursor.fetchall()
 
-            return DatabaseHealth(
+            total_events, last_event_ts = result[0] if result else (0, None)
+            health = DatabaseHealth.model_construct(
                 is_connected=True, backend_type="clickhouse", total_events=total_events, last_event_ts=last_event_ts
             )
+            self._health_cache = (monotonic() + HEALTH_CACHE_TTL_SEC, health)
+            return health
 
         except Exception as e:
             logger.error(f"ClickHouse health check failed: {e}")
-            return DatabaseHealth(is_connected=False, backend_type="clickhouse", total_events=0, last_event_ts=None)
+            return DatabaseHealth.model_construct(
+                is_connected=False, backend_type="clickhouse", total_events=0, last_event_ts=None
+            )
 
     async def get_events_count_by_repo(self, repo_name: str) -> int:
-        """Get total event count for a specific repository"""
+        """Get total event count for a specific repository (cached for REPO_COUNT_CACHE_TTL_SEC)"""
+        cached = self._repo_count_cache.get(repo_name)
+        if cached is not None and cached[0] > monotonic():
+            return cached[1]
+
         try:
             async with self._get_connection() as connection:
                 async with connection.cursor() as cursor:
-                    await cursor.execute(
-                        "SELECT count(*) FROM events WHERE repo_name = %(repo_name)s", {"repo_name": repo_name}
-                    )
+                    await cursor.execute(COUNT_BY_REPO_QUERY, {"repo_name": repo_name})
                     result = await cursor.fetchall()
-            return result[0][0] if result else 0
+            count = result[0][0] if result else 0
+
+            if len(self._repo_count_cache) >= REPO_COUNT_CACHE_MAXSIZE:
+                self._repo_count_cache.clear()
+            self._repo_count_cache[repo_name] = (monotonic() + REPO_COUNT_CACHE_TTL_SEC, count)
+            return count
         except Exception as e:
             logger.error(f"Failed to get repo event count from ClickHouse: {e}")
             return 0
@@ -417,20 +541,17 @@ class ClickHouseDatabaseService(DatabaseService):
             action,
             event_type
         FROM events 
-        WHERE repo_name = %(repo_name)s
+        PREWHERE repo_name = %(repo_name)s
         ORDER BY created_at_ts DESC
         """
 
         try:
-            async with self._get_connection() as connection:
-                async with connection.cursor() as cursor:
-                    await cursor.execute(query, {"repo_name": repo_name})
-                    result = await cursor.fetchall()
-
             events: List[EventInfo] = []
-            for row in result:
-                event_id, action, event_type = row
-                events.append(EventInfo(event_id=event_id, action=action or "", event_type=event_type))
+            async for rows in self._stream_rows(query, {"repo_name": repo_name}):
+                events.extend(
+                    EventInfo(event_id=event_id, action=action or "", event_type=event_type)
+                    for event_id, action, event_type in rows
+                )
 
             return events
 
@@ -0,0 +1,37 @@
+"""
+Database configuration read from the environment.
+
+Values are read once and cached - call these only after the dotenv file has been loaded.
+"""
+
+import os
+from functools import lru_cache
+
+from .base import ClickHouseConfig
+
+# Default cap on events retained by the in-memory backend
+DEFAULT_MEMORY_MAX_EVENTS = 1_000_000
+
+
+@lru_cache(maxsize=1)
+def database_backend() -> str:
+    """Get configured database backend name (DATABASE_BACKEND, default: memory)"""
+    return os.getenv("DATABASE_BACKEND", "memory").lower()
+
+
+@lru_cache(maxsize=1)
+def clickhouse_config() -> ClickHouseConfig:
+    """Get ClickHouse connection parameters from CLICKHOUSE_* environment variables"""
+    return {
+        "host": os.getenv("CLICKHOUSE_HOST", "localhost"),
+        "port": int(os.getenv("CLICKHOUSE_PORT", "9000")),
+        "username": os.getenv("CLICKHOUSE_USER", "github_user"),
+        "password": os.getenv("CLICKHOUSE_PASSWORD", "github_pass"),
+        "database": os.getenv("CLICKHOUSE_DATABASE", "github_stats"),
+    }
+
+
+@lru_cache(maxsize=1)
+def memory_max_events() -> int:
+    """Get max number of raw events kept by the in-memory backend (MEMORY_MAX_EVENTS, default: 1000000)"""
+    return int(os.getenv("MEMORY_MAX_EVENTS", str(DEFAULT_MEMORY_MAX_EVENTS)))
@@ -2,100 +2,412 @@
 In-memory implementation of DatabaseService for backwards compatibility
 """
 
+from array import array
+from collections import Counter
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
-from typing import List
-from github.Event import Event
+from typing import List, Optional
 from loguru import logger
+import asyncio
+import bisect
+import sys
+import threading
 
-from .base import DatabaseService, EventData, EventCountsByType, DatabaseHealth, EventInfo, RepoEventCount
+from .config import DEFAULT_MEMORY_MAX_EVENTS
+from .base import FILTERED_EVENT_TYPES, DatabaseService, RawEvent, parse_github_timestamp, EventData, EventCountsByType, PullRequestMetrics, DatabaseHealth, EventInfo, RepoEventCount
 
+# Stored event types, position in the tuple is the type id kept in the event columns
+EVENT_TYPES = tuple(sorted(FILTERED_EVENT_TYPES))
+_EVENT_TYPE_IDS = {event_type: type_id for type_id, event_type in enumerate(EVENT_TYPES)}
+_PULL_REQUEST_TYPE_ID = _EVENT_TYPE_IDS["PullRequestEvent"]
+
+
+@dataclass(slots=True)
+class _PullRequestStats:
+    """Running per-repository PullRequestEvent aggregate"""
+
+    count: int
+    first_ts: datetime
+    last_ts: datetime
+
+    def add(self, ts: datetime):
+        self.count += 1
+        if ts < self.first_ts:
+            self.first_ts = ts
+        elif ts > self.last_ts:
+            self.last_ts = ts
+
+    def avg_time_between_seconds(self) -> float:
+        # Consecutive gaps of the time-sorted events telescope: their sum is always last - first,
+        # so order of arrival doesn't matter and no per-event timestamps need to be kept
+        if self.count < 2:
+            return 0.0
+        return (self.last_ts - self.first_ts).total_seconds() / (self.count - 1)
 
-class InMemoryDatabaseService(DatabaseService):
-    """In-memory implementation of DatabaseService for backwards compatibility"""
+
+class _EventColumns:
+    """
+    Column-oriented (struct of arrays) event storage for one shard.
+
+    Numeric fields live in packed `array` columns and repository names are interned to per-shard ids,
+    so a stored event costs a few machine words instead of a model object, and whole-column operations
+    (count, max) run in C.
+    """
+
+    __slots__ = (
+        "event_ids",
+        "type_ids",
+        "repo_name_ids",
+        "repo_ids",
+        "created_at",
+        "ingested_at",
+        "actions",
+        "repo_names",
+        "repo_name_to_id",
+        "repo_event_counts",
+    )
 
     def __init__(self):
-        self.filtered_event_types = {"WatchEvent", "PullRequestEvent", "IssuesEvent"}
-
-        import threading
-
-        self._lock = threading.RLock()
-        self.events: List[EventData] = []
-
-    def _event_to_data(self, event: Event) -> EventData:
-        """Convert GitHub Event to EventData"""
-        return EventData(
-            event_id=event.id,
-            event_type=event.type,
-            repo_name=event.repo.name if event.repo else "unknown",
-            repo_id=event.repo.id if event.repo else 0,
-            created_at_ts=event.created_at,
-            action=getattr(event.payload, "action", None),
+        self.event_ids: List[str] = []
+        self.type_ids = array("b")
+        self.repo_name_ids = array("l")
+        self.repo_ids = array("q")
+        self.created_at = array("d")  # epoch seconds
+        self.ingested_at = array("d")  # epoch seconds
+        self.actions: List[Optional[str]] = []
+        self.repo_names: List[str] = []
+        self.repo_name_to_id: dict[str, int] = {}
+        # Number of stored events per repository name id, kept in step with append/drop_oldest
+        self.repo_event_counts: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.event_ids)
+
+    def repo_name_id(self, repo_name: str) -> int:
+        """Get id of an already stored repository name, -1 when unknown"""
+        return self.repo_name_to_id.get(repo_name, -1)
+
+    def append(self, event_data: EventData):
+        repo_name_id = self.repo_name_to_id.get(event_data.repo_name)
+        if repo_name_id is None:
+            repo_name_id = self.repo_name_to_id[event_data.repo_name] = len(self.repo_names)
+            self.repo_names.append(event_data.repo_name)
+            self.repo_event_counts.append(0)
+        self.repo_event_counts[repo_name_id] += 1
+
+        self.event_ids.append(event_data.event_id)
+        self.type_ids.append(_EVENT_TYPE_IDS[event_data.event_type])
+        self.repo_name_ids.append(repo_name_id)
+        self.repo_ids.append(event_data.repo_id)
+        self.created_at.append(event_data.created_at_ts.timestamp())
+        self.ingested_at.append(event_data.ingested_at.timestamp())
+        self.actions.append(event_data.action)
+
+    def row(self, i: int) -> EventData:
+        """Materialize a stored event (trusted values, no validation)"""
+        return EventData.model_construct(
+            event_id=self.event_ids[i],
+            event_type=EVENT_TYPES[self.type_ids[i]],
+            repo_name=self.repo_names[self.repo_name_ids[i]],
+            repo_id=self.repo_ids[i],
+            created_at_ts=datetime.fromtimestamp(self.created_at[i], tz=timezone.utc),
+            action=self.actions[i],
+            ingested_at=datetime.fromtimestamp(self.ingested_at[i], tz=timezone.utc),
+        )
+
+    def copy(self) -> "_EventColumns":
+        """Copy of the columns (C-level copies of arrays and lists), so a scan can run without the shard lock"""
+        columns = _EventColumns.__new__(_EventColumns)
+        columns.event_ids = self.event_ids[:]
+        columns.type_ids = self.type_ids[:]
+        columns.repo_name_ids = self.repo_name_ids[:]
+        columns.repo_ids = self.repo_ids[:]
+        columns.created_at = self.created_at[:]
+        columns.ingested_at = self.ingested_at[:]
+        columns.actions = self.actions[:]
+        columns.repo_names = self.repo_names[:]
+        columns.repo_name_to_id = self.repo_name_to_id.copy()
+        columns.repo_event_counts = self.repo_event_counts[:]
+        return columns
+
+    def drop_oldest(self, count: int) -> Counter[tuple[int, int]]:
+        """
+        Drop the first `count` stored events (oldest by insertion order).
+
+        Returns counts of the dropped events by (epoch minute of created_at, type id).
+        """
+        repo_event_counts = self.repo_event_counts
+        for repo_name_id in self.repo_name_ids[:count]:
+            repo_event_counts[repo_name_id] -= 1
+        dropped = Counter(
+            (int(created_at) // 60, type_id)
+            for created_at, type_id in zip(self.created_at[:count], self.type_ids[:count])
         )
 
-    async def insert_events(self, events: List[Event]) -> int:
-        """Insert GitHub events and return count of inserted records"""
-        with self._lock:
-            filtered_events = [event for event in events if event.type in self.filtered_event_types]
+        del self.event_ids[:count]
+        del self.type_ids[:count]
+        del self.repo_name_ids[:count]
+        del self.repo_ids[:count]
+        del self.created_at[:count]
+        del self.ingested_at[:count]
+        del self.actions[:count]
 
-            event_data_list = [self._event_to_data(event) for event in filtered_events]
-            self.events.extend(event_data_list)
+        # Forget repository names without any stored event, renumbering the remaining ones
+        live_ids = [repo_name_id for repo_name_id, event_count in enumerate(repo_event_counts) if event_count]
+        if len(live_ids) < len(self.repo_names):
+            new_ids = [-1] * len(self.repo_names)
+            for new_id, old_id in enumerate(live_ids):
+                new_ids[old_id] = new_id
+            self.repo_names = [self.repo_names[old_id] for old_id in live_ids]
+            self.repo_event_counts = [repo_event_counts[old_id] for old_id in live_ids]
+            self.repo_name_to_id = {repo_name: new_id for new_id, repo_name in enumerate(self.repo_names)}
+            self.repo_name_ids = array("l", [new_ids[old_id] for old_id in self.repo_name_ids])
 
-            if event_data_list:
-                logger.debug(f"Added {len(event_data_list)} filtered events, total stored: {len(self.events)}")
+        return dropped
+
+    def pull_request_stats(self) -> dict[str, "_PullRequestStats"]:
+        """Build per-repository PullRequestEvent aggregates of the stored events"""
+        # repo name id -> [count, first epoch, last epoch]
+        spans: dict[int, List[float]] = {}
+        for repo_name_id, type_id, created_at in zip(self.repo_name_ids, self.type_ids, self.created_at):
+            if type_id != _PULL_REQUEST_TYPE_ID:
+                continue
+            span = spans.get(repo_name_id)
+            if span is None:
+                spans[repo_name_id] = [1, created_at, created_at]
+            else:
+                span[0] += 1
+                if created_at < span[1]:
+                    span[1] = created_at
+                elif created_at > span[2]:
+                    span[2] = created_at
+
+        return {
+            self.repo_names[repo_name_id]: _PullRequestStats(
+                count=int(count),
+                first_ts=datetime.fromtimestamp(first, tz=timezone.utc),
+                last_ts=datetime.fromtimestamp(last, tz=timezone.utc),
+            )
+            for repo_name_id, (count, first, last) in spans.items()
+        }
+
+
+class InMemoryDatabaseService(DatabaseService):
+    """
+    In-memory implementation of DatabaseService for backwards compatibility
 
-            return len(event_data_list)
+    At most `max_events` raw events are retained (split evenly between shards), the oldest are evicted
+    first. Event counts by type and pull request metrics come from aggregates kept on insert; on eviction
+    the shard's pull request aggregates are rebuilt from its retained events and the evicted events are
+    subtracted from their minute buckets, so the aggregates cover exactly the retained events.
+    """
+
+    def __init__(self, num_shards: int = 16, max_events: int = DEFAULT_MEMORY_MAX_EVENTS):
+        assert num_shards > 0 and num_shards & (num_shards - 1) == 0, "num_shards must be a power of two"
+        assert max_events > 0, "max_events must be positive"
+
+        # Events are sharded by repository name, each shard guarded by its own lock, so per-repo
+        # queries touch a single shard and writers/readers of different shards don't contend
+        self._shard_mask = num_shards - 1
+        self._shards = [_EventColumns() for _ in range(num_shards)]
+        self._locks = [threading.Lock() for _ in range(num_shards)]
+        self._shard_max_events = max(1, max_events // num_shards)
+        # Evict in chunks, so the O(shard) column shift is paid once per many inserts, not on every one
+        self._shard_evict_slack = self._shard_max_events // 8
+        # Per-shard repo_name -> PR aggregate, maintained on insert under the shard lock
+        self._pr_stats: List[dict[str, _PullRequestStats]] = [{} for _ in range(num_shards)]
+
+        # Event counts by type per minute of created_at (epoch minute -> counts), across all shards
+        self._minute_counts: dict[int, Counter[str]] = {}
+        # Bucket minutes in ascending order, for binary search of the query window start
+        self._minutes: List[int] = []
+        self._minute_counts_lock = threading.Lock()
+        # Newest created_at seen so far, maintained on insert under the minute counts lock
+        self._last_event_ts: Optional[datetime] = None
+
+    def _shard_index(self, repo_name: str) -> int:
+        return hash(repo_name) & self._shard_mask
+
+    async def insert_events(self, events: List[RawEvent]) -> int:
+        """Insert raw GitHub events and return count of inserted records"""
+        filtered_events = [event for event in events if event.get("type") in FILTERED_EVENT_TYPES]
+
+        # Convert and group by shard before taking any lock, so every shard lock is taken at most once
+        # per batch and held only for the appends
+        # One timestamp for the whole batch instead of EventData's per-event default factory
+        ingested_at = datetime.now(timezone.utc)
+        shard_mask = self._shard_mask
+        # Globals and attributes used per event, resolved once for the whole batch
+        construct = EventData.model_construct
+        intern = sys.intern
+        parse_timestamp = parse_github_timestamp
+        by_shard: dict[int, List[EventData]] = {}
+        for event in filtered_events:
+            repo = event.get("repo") or {}
+            # Interned, so the type/repo dict lookups on insert hit on identity instead of comparing strings
+            repo_name = intern(repo.get("name") or "unknown")
+            # Values already have the right types, validation skipped
+            event_data = construct(
+                event_id=str(event["id"]),
+                event_type=intern(event["type"]),
+                repo_name=repo_name,
+                repo_id=repo.get("id") or 0,
+                created_at_ts=parse_timestamp(event["created_at"]),
+                action=(event.get("payload") or {}).get("action"),
+                ingested_at=ingested_at,
+            )
+            by_shard.setdefault(hash(repo_name) & shard_mask, []).append(event_data)
+
+        with self._minute_counts_lock:
+            last_event_ts = self._last_event_ts
+            for shard_events in by_shard.values():
+                for event_data in shard_events:
+                    created_at_ts = event_data.created_at_ts
+                    minute = int(created_at_ts.timestamp()) // 60
+                    counts = self._minute_counts.get(minute)
+                    if counts is None:
+                        counts = self._minute_counts[minute] = Counter()
+                        # Events arrive roughly in time order, so this is almost always an append
+                        bisect.insort(self._minutes, minute)
+                    counts[event_data.event_type] += 1
+                    if last_event_ts is None or created_at_ts > last_event_ts:
+                        last_event_ts = created_at_ts
+            self._last_event_ts = last_event_ts
+
+        evicted_counts: Counter[tuple[int, int]] = Counter()
+        for index, shard_events in by_shard.items():
+            with self._locks[index]:
+                shard = self._shards[index]
+                pr_stats = self._pr_stats[index]
+                for event_data in shard_events:
+                    shard.append(event_data)
+
+                    if event_data.event_type != "PullRequestEvent":
+                        continue
+                    stats = pr_stats.get(event_data.repo_name)
+                    if stats is None:
+                        ts = event_data.created_at_ts
+                        pr_stats[event_data.repo_name] = _PullRequestStats(count=1, first_ts=ts, last_ts=ts)
+                    else:
+                        stats.add(event_data.created_at_ts)
+
+                if len(shard) > self._shard_max_events:
+                    evicted = len(shard) - self._shard_max_events + self._shard_evict_slack
+                    evicted_counts.update(shard.drop_oldest(evicted))
+                    # Metrics of the shard's repositories only cover the events still stored
+                    self._pr_stats[index] = shard.pull_request_stats()
+                    logger.debug(f"Evicted {evicted} oldest events from shard {index}")
+
+        if evicted_counts:
+            self._subtract_minute_counts(evicted_counts)
+
+        if filtered_events:
+            logger.debug(f"Added {len(filtered_events)} filtered events across {len(by_shard)} shards")
+
+        return len(filtered_events)
+
+    def _subtract_minute_counts(self, evicted_counts: Counter[tuple[int, int]]):
+        """Take evicted events out of the minute buckets, dropping buckets left empty"""
+        emptied: List[int] = []
+        with self._minute_counts_lock:
+            for (minute, type_id), count in evicted_counts.items():
+                counts = self._minute_counts.get(minute)
+                if counts is None:
+                    continue
+                event_type = EVENT_TYPES[type_id]
+                counts[event_type] -= count
+                if counts[event_type] <= 0:
+                    del counts[event_type]
+                if not counts:
+                    del self._minute_counts[minute]
+                    emptied.append(minute)
+            if emptied:
+                emptied_minutes = set(emptied)
+                self._minutes = [minute for minute in self._minutes if minute not in emptied_minutes]
+        if emptied:
+            logger.debug(f"Dropped {len(emptied)} minute buckets of evicted events")
 
     async def get_events_by_type_and_offset(self, offset_minutes: int) -> EventCountsByType:
         """Get event counts by type within the specified time offset"""
         cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=offset_minutes)
+        # Sum whole minute buckets starting at or after the cutoff (minute granularity)
+        first_minute = -(-int(cutoff_time.timestamp()) // 60)
 
-        with self._lock:
-            event_counts: dict[str, int] = {}
-            for event in self.events:
-                if event.created_at_ts >= cutoff_time:
-                    event_counts[event.event_type] = event_counts.get(event.event_type, 0) + 1
+        event_counts: Counter[str] = Counter()
+        with self._minute_counts_lock:
+            # O(log buckets) to find the window, then only buckets inside it are touched
+            start = bisect.bisect_left(self._minutes, first_minute)
+            for minute in self._minutes[start:]:
+                event_counts.update(self._minute_counts[minute])
 
-            total_events = sum(event_counts.values())
+        total_events = event_counts.total()
 
-            return EventCountsByType(offset_minutes=offset_minutes, event_counts=event_counts, total_events=total_events)
+        return EventCountsByType.model_construct(
+            offset_minutes=offset_minutes, event_counts=dict(event_counts), total_events=total_events
+        )
+
+    def _pull_request_events_for_repo(self, repo_name: str) -> List[EventData]:
+        index = self._shard_index(repo_name)
+        # The event loop takes shard locks synchronously on insert, so hold the lock only for the column
+        # copy and scan the copy after releasing it
+        with self._locks[index]:
+            shard = self._shards[index]
+            repo_name_id = shard.repo_name_id(repo_name)
+            if repo_name_id < 0:
+                return []
+            shard = shard.copy()
+        return [
+            shard.row(i)
+            for i, (name_id, type_id) in enumerate(zip(shard.repo_name_ids, shard.type_ids))
+            if name_id == repo_name_id and type_id == _PULL_REQUEST_TYPE_ID
+        ]
 
     async def get_pull_request_events_for_repo(self, repo_name: str) -> List[EventData]:
         """Get all PullRequestEvent events for a specific repository"""
-        with self._lock:
-            return [event for event in self.events if event.event_type == "PullRequestEvent" and event.repo_name == repo_name]
+        # Linear scan of a whole shard copy - run it in a worker thread, not on the event loop
+        return await asyncio.to_thread(self._pull_request_events_for_repo, repo_name)
 
     async def calculate_avg_pr_time(self, repo_name: str) -> float:
         """Calculate average time between pull requests for a repository in seconds"""
-        pr_events = await self.get_pull_request_events_for_repo(repo_name)
-
-        if len(pr_events) < 2:
-            return 0.0
-
-        # Sort by creation time
-        pr_events.sort(key=lambda x: x.created_at_ts)
-
-        time_diffs: list[float] = []
-        for i in range(1, len(pr_events)):
-            diff = (pr_events[i].created_at_ts - pr_events[i - 1].created_at_ts).total_seconds()
-            time_diffs.append(diff)
+        index = self._shard_index(repo_name)
+        with self._locks[index]:
+            stats = self._pr_stats[index].get(repo_name)
+            return stats.avg_time_between_seconds() if stats else 0.0
 
-        return sum(time_diffs) / len(time_diffs) if time_diffs else 0.0
+    async def get_pr_metrics(self, repo_name: str) -> PullRequestMetrics:
+        """Get average time between pull requests and their count from the per-repository aggregate"""
+        index = self._shard_index(repo_name)
+        with self._locks[index]:
+            stats = self._pr_stats[index].get(repo_name)
+            if stats is None:
+                return PullRequestMetrics.model_construct(
+                    repository=repo_name, average_time_seconds=0.0, total_pull_requests=0
+                )
+            return PullRequestMetrics.model_construct(
+                repository=repo_name,
+                average_time_seconds=stats.avg_time_between_seconds(),
+                total_pull_requests=stats.count,
+            )
 
     async def get_health_status(self) -> DatabaseHealth:
         """Get database connection and health information"""
-        with self._lock:
-            last_event_ts = None
-            if self.events:
-                last_event_ts = max(event.created_at_ts for event in self.events)
+        # No event scan: shard sizes are list lengths and the newest timestamp is tracked on insert
+        total_events = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                total_events += len(shard)
 
-            return DatabaseHealth(
-                is_connected=True, backend_type="in-memory", total_events=len(self.events), last_event_ts=last_event_ts
-            )
+        return DatabaseHealth.model_construct(
+            is_connected=True, backend_type="in-memory", total_events=total_events, last_event_ts=self._last_event_ts
+        )
 
     async def get_events_count_by_repo(self, repo_name: str) -> int:
         """Get total event count for a specific repository"""
-        with self._lock:
-            return len([event for event in self.events if event.repo_name == repo_name])
+        index = self._shard_index(repo_name)
+        with self._locks[index]:
+            shard = self._shards[index]
+            repo_name_id = shard.repo_name_id(repo_name)
+            return shard.repo_event_counts[repo_name_id] if repo_name_id >= 0 else 0
 
     async def get_events_for_repo(self, repo_name: str) -> List[EventInfo]:
         """Get all events for a repository - not implemented for in-memory backend"""
@@ -2,27 +2,39 @@
 Database service configuration and factory functions.
 """
 
+from typing import Callable
+
 from .base import DatabaseService, ClickHouseConfig
+from .config import memory_max_events
 from .memory import InMemoryDatabaseService
 from .clickhouse import ClickHouseDatabaseService
 
 
+def _create_clickhouse_service(conf: ClickHouseConfig | None) -> DatabaseService:
+    assert conf is not None, "Missing clickhouse config"
+    return ClickHouseDatabaseService(
+        host=conf["host"],
+        port=conf["port"],
+        username=conf["username"],
+        password=conf["password"],
+        database=conf["database"],
+    )
+
+
+# Backend name -> factory taking the (optional) ClickHouse config
+_FACTORIES: dict[str, Callable[[ClickHouseConfig | None], DatabaseService]] = {
+    "memory": lambda conf: InMemoryDatabaseService(max_events=memory_max_events()),
+    "clickhouse": _create_clickhouse_service,
+}
+
+
 def create_database_service(backend: str = "memory", conf: ClickHouseConfig | None = None) -> DatabaseService:
     """Factory function to create database service based on configuration"""
-    match backend.lower():
-        case "memory":
-            return InMemoryDatabaseService()
-        case "clickhouse":
-            assert conf is not None, "Missing clickhouse config"
-            return ClickHouseDatabaseService(
-                host=conf["host"],
-                port=conf["port"],
-                username=conf["username"],
-                password=conf["password"],
-                database=conf["database"],
-            )
-        case _:
-            raise ValueError(f"Unknown database backend: {backend}")
+    try:
+        factory = _FACTORIES[backend.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown database backend: {backend}") from None
+    return factory(conf)
 
 
 def configure_database_service(backend: str = "memory", conf: ClickHouseConfig | None = None) -> DatabaseService: